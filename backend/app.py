@@ -1,8 +1,17 @@
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from contextlib import asynccontextmanager
 from pydantic import BaseModel, HttpUrl
-from typing import Optional, List, Any, Dict
+from typing import Optional, List, Any, Dict, Callable
+import asyncio
+import gzip
+import logging
 import re
-import redis
+import struct
+import time
+import httpx
+from redis.asyncio import Redis as AsyncRedis
+from redis.exceptions import RedisError
 from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound
 from typing_extensions import TypedDict
 import os
@@ -11,18 +20,41 @@ from uuid import uuid4
 import json
 
 # --- LangChain/LangGraph/Elasticsearch Imports ---
-from langchain_openai import ChatOpenAI
-from langgraph.graph import StateGraph
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from langgraph.graph import StateGraph, START, END
+from langgraph.types import StreamWriter
 from langchain.prompts import PromptTemplate
+from langchain.text_splitter import RecursiveCharacterTextSplitter
 
 from langchain_core.output_parsers import PydanticOutputParser
-
-app = FastAPI()
+from langchain_core.rate_limiters import InMemoryRateLimiter
+from langchain_core.runnables import Runnable
+import openai
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await create_qna_index()
+    await start_quiz_batcher()
+    yield
+    quiz_batch_task.cancel()
+    await openai_http_client.aclose()
+    await redis_client.aclose()
+    await redis_bin.aclose()
+
+app = FastAPI(lifespan=lifespan)
 
 # Initialize Redis client (default localhost:6379)
 load_dotenv()
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+log = logging.getLogger(__name__)
 redis_host = os.getenv("REDIS_HOST", "localhost")
-redis_client = redis.Redis(host=redis_host, port=6379, db=0, decode_responses=True)
+redis_client = AsyncRedis(host=redis_host, port=6379, db=0, decode_responses=True)
+# Transcripts are stored gzip-compressed, so they go through a bytes client
+redis_bin = AsyncRedis(host=redis_host, port=6379, db=0, decode_responses=False)
+
+# Shared transcript client; fetch() is blocking so it runs in a worker thread
+transcript_api = YouTubeTranscriptApi()
 
 # --- Request Models ---
 class QuizRequest(BaseModel):
@@ -55,13 +87,61 @@ class TranscriptRequest(BaseModel):
     video_title: Optional[str] = None
     video_id: Optional[str] = None
 
+# --- Response Models (FastAPI serializes these straight to JSON bytes via pydantic-core) ---
+class TranscriptResponse(BaseModel):
+    video_id: str
+    transcript: str
+    cached: bool
+
+class QuizQuestionView(BaseModel):
+    question: str
+    options: List[str]
+
+class QuizResponse(BaseModel):
+    video_id: str
+    difficulty: str
+    questions: List[QuizQuestionView]
+    quiz_id: str
+    message: str
+
+class VerifyAnswersResponse(BaseModel):
+    video_id: Optional[str] = None
+    results: List[bool]
+    message: str
+
+_VIDEO_ID_RE = re.compile(r"(?:v=|youtu\.be/)([\w-]{11})")
+
 def extract_video_id(url: str) -> str:
     # Extracts the YouTube video ID from a URL
-    match = re.search(r"(?:v=|youtu.be/)([\w-]{11})", url)
+    match = _VIDEO_ID_RE.search(url)
     if not match:
         raise HTTPException(status_code=400, detail="Invalid YouTube video URL.")
     return match.group(1)
 
+def decode_transcript(blob: Optional[bytes]) -> Optional[str]:
+    if blob is None:
+        return None
+    # Entries written before compression was introduced are plain UTF-8
+    if blob[:2] == b"\x1f\x8b":
+        blob = gzip.decompress(blob)
+    return blob.decode()
+
+# Short-lived in-process copy so concurrent endpoints for one video skip Redis
+LOCAL_TRANSCRIPT_TTL = 60  # seconds
+_LOCAL_TRANSCRIPT: dict[str, tuple[float, str]] = {}
+
+def get_local_transcript(video_id: str) -> Optional[str]:
+    entry = _LOCAL_TRANSCRIPT.get(video_id)
+    if entry and entry[0] > time.monotonic():
+        return entry[1]
+    return None
+
+def set_local_transcript(video_id: str, transcript: str) -> None:
+    now = time.monotonic()
+    for key in [k for k, (expires, _) in _LOCAL_TRANSCRIPT.items() if expires <= now]:
+        del _LOCAL_TRANSCRIPT[key]
+    _LOCAL_TRANSCRIPT[video_id] = (now + LOCAL_TRANSCRIPT_TTL, transcript)
+
 def get_video_id_from_request(request) -> str:
     video_id = getattr(request, 'video_id', None)
     if video_id:
@@ -74,36 +154,194 @@ def get_video_id_from_request(request) -> str:
             raise HTTPException(status_code=400, detail=f"Invalid video_url: {str(e)}")
     raise HTTPException(status_code=400, detail="Either video_id or video_url must be provided.")
 
-@app.post("/transcript")
-def get_transcript(request: TranscriptRequest):
+# Loads in progress per video_id, so concurrent callers share one Redis read / fetch
+_TRANSCRIPT_LOADS: dict[str, asyncio.Task] = {}
+
+async def load_transcript(video_id: str) -> tuple[str, bool]:
+    # Single transcript path for /transcript and the graph; returns (text, cached)
+    transcript = get_local_transcript(video_id)
+    if transcript:
+        return transcript, True
+    task = _TRANSCRIPT_LOADS.get(video_id)
+    if task is None:
+        task = asyncio.create_task(fetch_transcript(video_id))
+        _TRANSCRIPT_LOADS[video_id] = task
+        task.add_done_callback(lambda _: _TRANSCRIPT_LOADS.pop(video_id, None))
+    # Shielded so one caller disconnecting does not cancel the load for the others
+    return await asyncio.shield(task)
+
+async def fetch_transcript(video_id: str) -> tuple[str, bool]:
+    cache_key = f"transcript:{video_id}"
+    transcript = decode_transcript(await redis_bin.get(cache_key))
+    if transcript:
+        set_local_transcript(video_id, transcript)
+        return transcript, True
+    fetched = await asyncio.to_thread(transcript_api.fetch, video_id)
+    transcript_text = " ".join(snippet.text for snippet in fetched)
+    if transcript_text.strip():
+        await redis_bin.set(cache_key, gzip.compress(transcript_text.encode()))
+        set_local_transcript(video_id, transcript_text)
+    return transcript_text, False
+
+@app.post("/transcript", response_model=TranscriptResponse)
+async def get_transcript(request: TranscriptRequest):
     try:
         video_id = request.video_id or extract_video_id(str(request.video_url))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    cache_key = f"transcript:{video_id}"
-    transcript = redis_client.get(cache_key)
-    if transcript:
-        return {"video_id": video_id, "transcript": transcript, "cached": True}
-
     try:
-        transcript_list = YouTubeTranscriptApi().fetch(video_id).to_raw_data()
-        transcript_text = " ".join([item["text"] for item in transcript_list])
-        if not transcript_text.strip():
-            raise HTTPException(status_code=404, detail="Transcript is empty.")
-        redis_client.set(cache_key, transcript_text)
-        return {"video_id": video_id, "transcript": transcript_text, "cached": False}
+        transcript, cached = await load_transcript(video_id)
     except (TranscriptsDisabled, NoTranscriptFound):
         raise HTTPException(status_code=404, detail="Transcript not available for this video.")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Transcript extraction failed: {str(e)}")
+    if not transcript.strip():
+        raise HTTPException(status_code=404, detail="Transcript is empty.")
+    return {"video_id": video_id, "transcript": transcript, "cached": cached}
 
 # --- LangChain LLM ---
-llm = ChatOpenAI(model="gpt-4o-mini")
+# Token bucket sized to the account's requests-per-minute limit
+rate_limiter = InMemoryRateLimiter(
+    requests_per_second=float(os.getenv("OPENAI_RPM", "500")) / 60,
+    check_every_n_seconds=0.05,
+)
+# One pooled HTTP/2 client keeps OpenAI connections alive across requests
+openai_http_client = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+)
+# max_retries=0 leaves openai_retry below as the only retry layer
+llm = ChatOpenAI(
+    model="gpt-4o-mini",
+    rate_limiter=rate_limiter,
+    http_async_client=openai_http_client,
+    max_retries=0,
+)
+# Caps in-flight OpenAI requests; size it to the account's rate limit tier
+llm_semaphore = asyncio.Semaphore(int(os.getenv("OPENAI_MAX_CONCURRENCY", "8")))
+
+# Back off on 429s and transient failures; the semaphore is released while waiting
+openai_retry = retry(
+    retry=retry_if_exception_type((openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError)),
+    wait=wait_exponential(multiplier=1, max=16),
+    stop=stop_after_attempt(5),
+    reraise=True,
+)
+
+@openai_retry
+async def call_llm(prompt: Any, runnable: Optional[Runnable] = None) -> Any:
+    async with llm_semaphore:
+        return await (runnable or llm).ainvoke(prompt)
+
+async def astream_llm(prompt: str):
+    # A producer task holds the OpenAI slot only while the upstream response is read;
+    # chunks wait in the queue for however long the client takes to consume them
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def produce():
+        try:
+            async with llm_semaphore:
+                async for chunk in llm.astream(prompt):
+                    if chunk.content:
+                        queue.put_nowait(chunk.content)
+            queue.put_nowait(None)
+        except Exception as e:
+            queue.put_nowait(e)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        producer.cancel()
+
+async def stream_to_writer(prompt: str, writer: StreamWriter) -> str:
+    parts = []
+    async for text in astream_llm(prompt):
+        parts.append(text)
+        writer(text)
+    return "".join(parts)
+
+LLM_CACHE_TTL = 86400  # LLM outputs are deterministic per transcript, keep them a day
+
+# --- Semantic cache for /chat answers (RediSearch HNSW index over question embeddings) ---
+embeddings = OpenAIEmbeddings(
+    model="text-embedding-3-small",
+    http_async_client=openai_http_client,
+    max_retries=0,
+)
+
+@openai_retry
+async def embed_question(question: str) -> List[float]:
+    await rate_limiter.aacquire()
+    async with llm_semaphore:
+        return await embeddings.aembed_query(question)
+
+QNA_INDEX = "qna_idx"
+QNA_EMBEDDING_DIM = 1536
+QNA_SIMILARITY_THRESHOLD = 0.95
+qna_index_ready = False
+
+async def create_qna_index():
+    global qna_index_ready
+    try:
+        await redis_client.execute_command(
+            "FT.CREATE", QNA_INDEX, "ON", "HASH", "PREFIX", "1", "qna:",
+            "SCHEMA",
+            "video_id", "TAG",
+            "answer", "TEXT", "NOINDEX",
+            "embedding", "VECTOR", "HNSW", "6",
+            "TYPE", "FLOAT32", "DIM", str(QNA_EMBEDDING_DIM), "DISTANCE_METRIC", "COSINE",
+        )
+        qna_index_ready = True
+    except RedisError as e:
+        if "already exists" in str(e).lower():
+            qna_index_ready = True
+        else:
+            log.warning("Semantic cache disabled: %s", e)
+
+def pack_embedding(vector: List[float]) -> bytes:
+    return struct.pack(f"<{len(vector)}f", *vector)
+
+def escape_tag(value: str) -> str:
+    return re.sub(r"(\W)", r"\\\1", value)
+
+async def semantic_cache_lookup(video_id: str, vector: List[float]) -> Optional[str]:
+    result = await redis_client.execute_command(
+        "FT.SEARCH", QNA_INDEX,
+        f"(@video_id:{{{escape_tag(video_id)}}})=>[KNN 1 @embedding $vec AS score]",
+        "PARAMS", "2", "vec", pack_embedding(vector),
+        "RETURN", "2", "answer", "score",
+        "DIALECT", "2",
+    )
+    if not result or result[0] == 0:
+        return None
+    fields = dict(zip(result[2][::2], result[2][1::2]))
+    # KNN score is cosine distance
+    if 1 - float(fields["score"]) >= QNA_SIMILARITY_THRESHOLD:
+        return fields["answer"]
+    return None
+
+async def semantic_cache_store(video_id: str, question: str, answer: str, vector: List[float]) -> None:
+    key = f"qna:{video_id}:{uuid4()}"
+    await redis_client.hset(key, mapping={
+        "video_id": video_id,
+        "question": question,
+        "answer": answer,
+        "embedding": pack_embedding(vector),
+    })
+    await redis_client.expire(key, LLM_CACHE_TTL)
 
 # --- State Schema for LangGraph ---
 class QuizState(TypedDict, total=False):
     video_id: str
+    tasks: list[str]
     transcript: str
     difficulty: str
     num_questions: int
@@ -112,6 +350,7 @@ class QuizState(TypedDict, total=False):
     topics: list[str]
     answer: str
     questions: list[Dict[str, Any]]
+    questions_json: str
 
 # --- Quiz Question Model for quiz_generator output parsing ---
 class QuizQuestion(BaseModel):
@@ -122,125 +361,362 @@ class QuizQuestion(BaseModel):
 class QuizQuestions(BaseModel):
     questions: List[QuizQuestion]
 
+class BatchedQuiz(BaseModel):
+    id: int
+    questions: List[QuizQuestion]
+
+class QuizBatch(BaseModel):
+    quizzes: List[BatchedQuiz]
+
 # --- LangGraph Node Functions ---
-def transcript_loader(state: QuizState) -> dict:
+async def transcript_loader(state: QuizState) -> dict:
     video_id = state.get("video_id")
     if not video_id:
         return {"transcript": ""}
-    cache_key = f"transcript:{video_id}"
-    transcript = redis_client.get(cache_key)
-    if transcript:
-        return {"transcript": transcript}
-    transcript_list = YouTubeTranscriptApi().fetch(video_id).to_raw_data()
-    transcript_text = " ".join([item["text"] for item in transcript_list])
-    if transcript_text.strip():
-        redis_client.set(cache_key, transcript_text)
-    return {"transcript": transcript_text}
+    transcript, _ = await load_transcript(video_id)
+    return {"transcript": transcript}
+
+# Prompts, parsers and chains are built once; get_format_instructions renders a JSON schema
+quiz_parser = PydanticOutputParser(pydantic_object=QuizQuestions)
+quiz_prompt = PromptTemplate.from_template("""
+    Generate {num_questions} {difficulty} level multiple-choice quiz questions 
+    from the following transcript. Each question should have exactly 4 options, 
+    with 1 correct answer and 3 plausible distractors. 
+    
+    Return the output in **valid JSON** only.
+    Use this schema:
+    {format_instructions}
+    
+    Transcript:
+    "{transcript}"
+""").partial(format_instructions=quiz_parser.get_format_instructions())
+quiz_chain = quiz_prompt | llm | quiz_parser
+
+quiz_batch_parser = PydanticOutputParser(pydantic_object=QuizBatch)
+quiz_batch_prompt = PromptTemplate.from_template("""
+    For each of the following transcripts produce a multiple-choice quiz, indexed by id.
+    Each quiz must contain the requested number of questions at the requested 
+    difficulty level. Each question should have exactly 4 options, 
+    with 1 correct answer and 3 plausible distractors. 
+    
+    Return the output in **valid JSON** only.
+    Use this schema:
+    {format_instructions}
+    
+    {transcripts}
+""").partial(format_instructions=quiz_batch_parser.get_format_instructions())
+quiz_batch_chain = quiz_batch_prompt | llm | quiz_batch_parser
 
-def quiz_generator(state: QuizState) -> dict:
-    transcript = state.get("transcript", "")
-    difficulty = state.get("difficulty", "medium")
-    num_questions = state.get("num_questions", 5)
-
-    generate_quiz_prompt = PromptTemplate.from_template("""
-        Generate {num_questions} {difficulty} level multiple-choice quiz questions 
-        from the following transcript. Each question should have exactly 4 options, 
-        with 1 correct answer and 3 plausible distractors. 
-        
-        Return the output in **valid JSON** only.
-        Use this schema:
-        {format_instructions}
-        
-        Transcript:
-        "{transcript}"
-    """)
-
-    parser = PydanticOutputParser(pydantic_object=QuizQuestions)
-    chain = generate_quiz_prompt | llm | parser
-
-    questions = chain.invoke({
+async def generate_quiz_questions(transcript: str, difficulty: str, num_questions: int) -> QuizQuestions:
+    return await call_llm({
         "transcript": transcript,
         "difficulty": difficulty,
         "num_questions": num_questions,
-        "format_instructions": parser.get_format_instructions()
-    })
-
-    return {"questions": questions.questions}
+    }, quiz_chain)
+
+async def generate_quiz_batch(requests: List[Dict[str, Any]]) -> Dict[int, QuizQuestions]:
+    # One LLM call for several transcripts; quizzes come back keyed by request index.
+    # Only the ids present in the response are returned, callers handle the rest.
+    transcripts = "\n\n".join(
+        f'Transcript id={i} ({r["num_questions"]} {r["difficulty"]} level questions):\n"{r["transcript"]}"'
+        for i, r in enumerate(requests)
+    )
+    batch = await call_llm({"transcripts": transcripts}, quiz_batch_chain)
+    return {
+        quiz.id: QuizQuestions(questions=quiz.questions)
+        for quiz in batch.quizzes
+        if 0 <= quiz.id < len(requests)
+    }
 
-def summarizer(state: QuizState) -> dict:
+# --- Quiz micro-batching ---
+QUIZ_BATCH_SIZE = int(os.getenv("QUIZ_BATCH_SIZE", "16"))
+QUIZ_BATCH_TIMEOUT = float(os.getenv("QUIZ_BATCH_TIMEOUT", "0.05"))  # seconds
+# Total transcript characters per batched prompt, keeps it inside the context window
+QUIZ_BATCH_MAX_CHARS = int(os.getenv("QUIZ_BATCH_MAX_CHARS", "60000"))
+quiz_queue: Optional[asyncio.Queue] = None
+quiz_batch_task: Optional[asyncio.Task] = None
+# The loop only keeps weak references to tasks, in-flight batches are held here
+quiz_batch_runs: set = set()
+
+async def run_quiz_batch(batch: List[tuple]) -> None:
+    futures = [future for _, _, future in batch]
+    try:
+        # Requests are only queued after a cache miss; one MGET picks up quizzes
+        # that an earlier batch stored while these were waiting
+        cached = await redis_client.mget([cache_key for cache_key, _, _ in batch])
+        pending: Dict[str, tuple] = {}
+        waiting: Dict[str, List[asyncio.Future]] = {}
+        for (cache_key, request, future), questions_json in zip(batch, cached):
+            if questions_json:
+                # A disconnected client leaves its future cancelled
+                if not future.done():
+                    future.set_result((QuizQuestions.model_validate_json(questions_json), questions_json))
+                continue
+            # Identical requests in one batch share a single slot
+            pending.setdefault(cache_key, request)
+            waiting.setdefault(cache_key, []).append(future)
+        if not pending:
+            return
+
+        requests = list(pending.values())
+        results: Dict[int, Any] = {}
+        if len(requests) > 1:
+            try:
+                results = await generate_quiz_batch(requests)
+            except Exception as e:
+                log.warning("Batched quiz generation failed, falling back per request: %s", e)
+        # Slots the batch did not answer are generated one by one
+        missing = [i for i in range(len(requests)) if i not in results]
+        fallback = await asyncio.gather(
+            *(generate_quiz_questions(**requests[i]) for i in missing),
+            return_exceptions=True,
+        )
+        results.update(zip(missing, fallback))
+
+        pipe = redis_client.pipeline(transaction=False)
+        for i, cache_key in enumerate(pending):
+            result = results[i]
+            if isinstance(result, Exception):
+                for future in waiting[cache_key]:
+                    if not future.done():
+                        future.set_exception(result)
+                continue
+            questions_json = result.model_dump_json()
+            pipe.set(cache_key, questions_json, ex=LLM_CACHE_TTL)
+            for future in waiting[cache_key]:
+                if not future.done():
+                    future.set_result((result, questions_json))
+        await pipe.execute()
+    except Exception as e:
+        for future in futures:
+            if not future.done():
+                future.set_exception(e)
+
+async def quiz_batch_worker() -> None:
+    loop = asyncio.get_running_loop()
+    carry = None
+    while True:
+        item = carry or await quiz_queue.get()
+        carry = None
+        batch = [item]
+        chars = len(item[1]["transcript"])
+        deadline = loop.time() + QUIZ_BATCH_TIMEOUT
+        while len(batch) < QUIZ_BATCH_SIZE:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(quiz_queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            # An item that would overflow the prompt starts the next batch instead
+            if chars + len(item[1]["transcript"]) > QUIZ_BATCH_MAX_CHARS:
+                carry = item
+                break
+            batch.append(item)
+            chars += len(item[1]["transcript"])
+        # Keep collecting the next batch while this one waits on the LLM
+        task = asyncio.create_task(run_quiz_batch(batch))
+        quiz_batch_runs.add(task)
+        task.add_done_callback(quiz_batch_runs.discard)
+
+async def start_quiz_batcher():
+    global quiz_queue, quiz_batch_task
+    quiz_queue = asyncio.Queue()
+    quiz_batch_task = asyncio.create_task(quiz_batch_worker())
+
+async def quiz_generator(state: QuizState) -> dict:
+    cache_key = f"quiz:{state.get('video_id')}:{state.get('difficulty', 'medium')}:{state.get('num_questions', 5)}"
+    # Cache hits return directly instead of waiting out the batch window
+    cached = await redis_client.get(cache_key)
+    if cached:
+        return {"questions": QuizQuestions.model_validate_json(cached).questions, "questions_json": cached}
+
+    request = {
+        "transcript": state.get("transcript", ""),
+        "difficulty": state.get("difficulty", "medium"),
+        "num_questions": state.get("num_questions", 5),
+    }
+    future = asyncio.get_running_loop().create_future()
+    await quiz_queue.put((cache_key, request, future))
+    questions, questions_json = await future
+    # The serialized form is reused for the per-quiz answer key
+    return {"questions": questions.questions, "questions_json": questions_json}
+
+def summary_prompt(transcript: str) -> str:
+    return f"Summarize this transcript: {transcript}..."
+
+def summary_reduce_prompt(summaries: str) -> str:
+    return f"Combine these summaries of consecutive parts of a video transcript into one summary: {summaries}"
+
+def topics_prompt(transcript: str) -> str:
+    return f"Extract main topics with timestamps from this transcript: {transcript}..."
+
+def topics_reduce_prompt(topics: str) -> str:
+    return f"Merge these topic lists from consecutive parts of a video transcript into one list of main topics with timestamps, removing duplicates: {topics}"
+
+# Long transcripts are split and mapped in parallel, then reduced in a final prompt
+transcript_splitter = RecursiveCharacterTextSplitter(chunk_size=8000, chunk_overlap=200)
+
+async def map_reduce_prompt(
+    transcript: str,
+    map_prompt: Callable[[str], str],
+    reduce_prompt: Callable[[str], str],
+) -> str:
+    chunks = transcript_splitter.split_text(transcript)
+    if len(chunks) <= 1:
+        return map_prompt(transcript)
+
+    async def map_chunk(chunk: str) -> str:
+        result = await call_llm(map_prompt(chunk))
+        return result.content
+
+    partials = await asyncio.gather(*(map_chunk(chunk) for chunk in chunks))
+    return reduce_prompt("\n".join(partials))
+
+def qna_prompt(transcript: str, question: str) -> str:
+    return f"Give short and clear answer to the question based on this context: {transcript}\nQuestion: {question}"
+
+async def summarizer(state: QuizState, writer: StreamWriter) -> dict:
+    cache_key = f"summary:{state.get('video_id')}"
+    cached = await redis_client.get(cache_key)
+    if cached:
+        writer(cached)
+        return {"summary": cached}
     transcript = state.get("transcript", "")
-    prompt = f"Summarize this transcript: {transcript}..."
-    summary = llm.invoke(prompt)
-    return {"summary": summary.content}
-
-def topic_extractor(state: QuizState) -> dict:
+    prompt = await map_reduce_prompt(transcript, summary_prompt, summary_reduce_prompt)
+    summary = await stream_to_writer(prompt, writer)
+    await redis_client.set(cache_key, summary, ex=LLM_CACHE_TTL)
+    return {"summary": summary}
+
+async def topic_extractor(state: QuizState, writer: StreamWriter) -> dict:
+    cache_key = f"topics:{state.get('video_id')}"
+    cached = await redis_client.get(cache_key)
+    if cached:
+        writer(cached)
+        return {"topics": cached}
     transcript = state.get("transcript", "")
-    print("######################################")
-    print(transcript)
-    print("######################################")
-    prompt = f"Extract main topics with timestamps from this transcript: {transcript}..."
-    topics = llm.invoke(prompt)
-    return {"topics": topics.content}
-
-def qna_agent(state: QuizState) -> dict:
+    log.debug("transcript length=%d", len(transcript))
+    prompt = await map_reduce_prompt(transcript, topics_prompt, topics_reduce_prompt)
+    topics = await stream_to_writer(prompt, writer)
+    await redis_client.set(cache_key, topics, ex=LLM_CACHE_TTL)
+    return {"topics": topics}
+
+async def qna_agent(state: QuizState, writer: StreamWriter) -> dict:
+    video_id = state.get("video_id", "")
     transcript = state.get("transcript", "")
     question = state.get("question", "")
-    prompt = f"Give short and clear answer to the question based on this context: {transcript}\nQuestion: {question}"
-    answer = llm.invoke(prompt)
-    return {"answer": answer.content}
+    vector = None
+    if qna_index_ready:
+        vector = await embed_question(question)
+        cached = await semantic_cache_lookup(video_id, vector)
+        if cached:
+            writer(cached)
+            return {"answer": cached}
+    prompt = qna_prompt(transcript, question)
+    answer = await stream_to_writer(prompt, writer)
+    if vector:
+        await semantic_cache_store(video_id, question, answer, vector)
+    return {"answer": answer}
 
 # --- StateGraph Setup ---
+TASK_NODES = ["quiz_generator", "summarizer", "topic_extractor", "qna_agent"]
+
+def route_tasks(state: QuizState):
+    # Requested sibling nodes fan out concurrently; no tasks means transcript only
+    return state.get("tasks") or END
+
 graph = StateGraph(QuizState)
 graph.add_node("transcript_loader", transcript_loader)
 graph.add_node("quiz_generator", quiz_generator)
 graph.add_node("summarizer", summarizer)
 graph.add_node("topic_extractor", topic_extractor)
 graph.add_node("qna_agent", qna_agent)
-graph.add_edge("transcript_loader", "quiz_generator")
-graph.add_edge("transcript_loader", "summarizer")
-graph.add_edge("transcript_loader", "topic_extractor")
-graph.add_edge("transcript_loader", "qna_agent")
+graph.add_edge(START, "transcript_loader")
+graph.add_conditional_edges("transcript_loader", route_tasks, TASK_NODES + [END])
+for node in TASK_NODES:
+    graph.add_edge(node, END)
 quiz_graph = graph
+quiz_app = graph.compile()
 
-# --- Update Endpoints to Use Graph (scaffold only, not full integration) ---
-@app.post("/generate-quiz")
-def generate_quiz(request: QuizRequest):
-    video_id = get_video_id_from_request(request)
-    state = {"video_id": video_id, "difficulty": request.difficulty, "num_questions": request.num_questions}
-    state.update(quiz_graph.nodes["transcript_loader"].runnable.invoke(state))
-    state.update(quiz_graph.nodes["quiz_generator"].runnable.invoke(state))
+# --- Streaming helpers ---
+def sse_event(text: str, event: Optional[str] = None) -> str:
+    # Each line of a multi-line chunk needs its own "data:" field
+    prefix = f"event: {event}\n" if event else ""
+    return prefix + "".join(f"data: {line}\n" for line in text.split("\n")) + "\n"
 
-    quiz_id = str(uuid4())
-    questions = QuizQuestions(questions=state["questions"])
-    redis_client.set(f"quiz:{quiz_id}", questions.model_dump_json(), ex=3600)  # Cache for 1 hour
-
-    print("Generated Questions:", state["questions"])
+async def sse_with_errors(events):
+    # Headers are already sent once streaming starts, so failures become an error event
+    try:
+        async for event in events:
+            yield event
+    except Exception as e:
+        log.exception("Streaming response failed")
+        yield sse_event(str(e) or type(e).__name__, event="error")
 
-    for question in state["questions"]:
-        if hasattr(question, "answer"):
-            delattr(question, "answer")
+async def stream_graph(state: dict) -> StreamingResponse:
+    # Nodes push text through their StreamWriter; the first chunk is awaited here so
+    # failures before any output still surface as an HTTP error
+    events = quiz_app.astream(state, stream_mode="custom")
+    try:
+        first = await events.__anext__()
+    except StopAsyncIteration:
+        first = None
 
-    return {
+    async def body():
+        try:
+            if first is not None:
+                yield sse_event(first)
+            async for chunk in events:
+                yield sse_event(chunk)
+        finally:
+            await events.aclose()
+
+    return StreamingResponse(sse_with_errors(body()), media_type="text/event-stream")
+
+# --- Endpoints (run through the compiled graph) ---
+@app.post("/generate-quiz", response_model=QuizResponse)
+async def generate_quiz(request: QuizRequest):
+    video_id = get_video_id_from_request(request)
+    state = await quiz_app.ainvoke({
         "video_id": video_id,
         "difficulty": request.difficulty,
-        "questions": state["questions"],
-        "quiz_id": quiz_id,
-        "message": "Quiz generated via LangGraph."
-    }
+        "num_questions": request.num_questions,
+        "tasks": ["quiz_generator"],
+    })
 
-@app.post("/verify-answers")
-def verify_answers(request: VerifyAnswersRequest):
+    quiz_id = str(uuid4())
+    await redis_client.set(f"quiz:{quiz_id}", state["questions_json"], ex=3600)  # Cache for 1 hour
+
+    log.debug("Generated %d questions for quiz %s", len(state["questions"]), quiz_id)
+
+    # Returning the response model itself leaves FastAPI a single serialization pass
+    return QuizResponse(
+        video_id=video_id,
+        difficulty=request.difficulty,
+        questions=[QuizQuestionView(question=q.question, options=q.options) for q in state["questions"]],
+        quiz_id=quiz_id,
+        message="Quiz generated via LangGraph.",
+    )
+
+@app.post("/verify-answers", response_model=VerifyAnswersResponse)
+async def verify_answers(request: VerifyAnswersRequest):
     questions = []
-    raw_data = redis_client.get(f"quiz:{request.quiz_id}")
+    raw_data = await redis_client.get(f"quiz:{request.quiz_id}")
     if raw_data:
         quiz_data = QuizQuestions.model_validate_json(raw_data)
         questions = quiz_data.questions
 
     correct_answers = []
     if questions:
-        correct_answers = [i for q in questions for i, op in enumerate(q.options) if q.answer == op]
+        # One index per question keeps results aligned with user_answers
+        correct_answers = [
+            q.options.index(q.answer) if q.answer in q.options else None
+            for q in questions
+        ]
     
-    results = [ua == ca for ua, ca in zip(request.user_answers, correct_answers)]
+    # A stored answer that matches no option can never be answered correctly
+    results = [ca is not None and ua == ca for ua, ca in zip(request.user_answers, correct_answers)]
 
     return {
         "video_id": request.video_id,
@@ -249,39 +725,19 @@ def verify_answers(request: VerifyAnswersRequest):
     }
 
 @app.post("/generate-summary")
-def generate_summary(request: SummaryRequest):
+async def generate_summary(request: SummaryRequest):
     video_id = get_video_id_from_request(request)
-    state = {"video_id": video_id}
-    state.update(quiz_graph.nodes["transcript_loader"].runnable.invoke(state))
-    state.update(quiz_graph.nodes["summarizer"].runnable.invoke(state))
-    return {
-        "video_id": video_id,
-        "summary": state["summary"],
-    }
+    return await stream_graph({"video_id": video_id, "tasks": ["summarizer"]})
 
 @app.post("/generate-topics")
-def generate_topics(request: TopicsRequest):
+async def generate_topics(request: TopicsRequest):
     video_id = get_video_id_from_request(request)
-    state = {"video_id": video_id}
-    state.update(quiz_graph.nodes["transcript_loader"].runnable.invoke(state))
-    state.update(quiz_graph.nodes["topic_extractor"].runnable.invoke(state))
-    return {
-        "video_id": video_id,
-        "topics": state["topics"],
-        "message": "Topics extracted via LangGraph."
-    }
+    return await stream_graph({"video_id": video_id, "tasks": ["topic_extractor"]})
 
 @app.post("/chat")
 async def chat_with_video(request: ChatRequest):
     video_id = get_video_id_from_request(request)
-    state = {"video_id": video_id, "question": request.question}
-    state.update(quiz_graph.nodes["transcript_loader"].runnable.invoke(state))
-    state.update(quiz_graph.nodes["qna_agent"].runnable.invoke(state))
-
-    return {
-        "video_id": video_id,
-        "answer": state["answer"],
-    }
+    return await stream_graph({"video_id": video_id, "question": request.question, "tasks": ["qna_agent"]})
 
 @app.get("/")
 def root():
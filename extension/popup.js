@@ -195,6 +195,64 @@ class YouTubeQuizGenerator {
         }
     }
 
+    async streamApiCall(endpoint, data, onChunk) {
+        try {
+            const url = `${this.backendUrl}${endpoint}`;
+            const response = await fetch(url, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify(data)
+            });
+
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+
+            // Parse the server-sent events as they arrive
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            let text = '';
+
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+
+                buffer += decoder.decode(value, { stream: true });
+                const events = buffer.split('\n\n');
+                buffer = events.pop();
+
+                for (const event of events) {
+                    const lines = event.split('\n');
+                    const chunk = lines
+                        .filter(line => line.startsWith('data:'))
+                        .map(line => line.replace(/^data: ?/, ''))
+                        .join('\n');
+
+                    // The backend reports failures after the 200 headers as an error event
+                    if (lines.includes('event: error')) {
+                        const streamError = new Error(chunk || 'Backend error');
+                        streamError.name = 'StreamError';
+                        throw streamError;
+                    }
+
+                    text += chunk;
+                    onChunk(text);
+                }
+            }
+
+            return text;
+        } catch (error) {
+            if (error.name === 'StreamError') {
+                throw error;
+            }
+            console.error('API call failed:', error);
+            throw new Error(`Failed to connect to backend: ${error.message}`);
+        }
+    }
+
     async generateQuiz() {
         if (!this.currentVideo) {
             this.showError('No video detected');
@@ -335,12 +393,11 @@ class YouTubeQuizGenerator {
         this.showLoading(true);
         
         try {
-            const response = await this.makeApiCall('/generate-summary', {
+            await this.streamApiCall('/generate-summary', {
                 video_id: this.currentVideo.videoId,
                 video_url: this.currentVideo.videoUrl
-            });
+            }, summary => this.displaySummary(summary));
 
-            this.displaySummary(response.summary);
             this.showSuccess('Summary generated successfully!');
             
         } catch (error) {
@@ -372,12 +429,11 @@ class YouTubeQuizGenerator {
         this.showLoading(true);
         
         try {
-            const response = await this.makeApiCall('/generate-topics', {
+            await this.streamApiCall('/generate-topics', {
                 video_id: this.currentVideo.videoId,
                 video_url: this.currentVideo.videoUrl
-            });
+            }, topics => this.displayTopics(topics));
 
-            this.displayTopics(response.topics);
             this.showSuccess('Topics extracted successfully!');
             
         } catch (error) {
@@ -389,16 +445,8 @@ class YouTubeQuizGenerator {
 
     displayTopics(topics) {
         const topicsContent = document.getElementById('topicsContent');
-        topicsContent.innerHTML = '';
-        
-        topics.forEach(topic => {
-            const topicDiv = document.createElement('div');
-            topicDiv.style.marginBottom = '8px';
-            topicDiv.innerHTML = `
-                <strong>${topic.topic}</strong> - ${this.formatTimestamp(topic.timestamp)}
-            `;
-            topicsContent.appendChild(topicDiv);
-        });
+        topicsContent.style.whiteSpace = 'pre-wrap';
+        topicsContent.textContent = topics;
 
         // Show topics section
         document.getElementById('results').style.display = 'block';
@@ -460,14 +508,14 @@ class YouTubeQuizGenerator {
         chatMessages.scrollTop = chatMessages.scrollHeight;
 
         try {
-            const response = await this.makeApiCall('/chat', {
+            await this.streamApiCall('/chat', {
                 video_id: this.currentVideo.videoId,
                 video_url: this.currentVideo.videoUrl,
                 question: message
+            }, answer => {
+                botMessageDiv.textContent = answer;
+                chatMessages.scrollTop = chatMessages.scrollHeight;
             });
-
-            botMessageDiv.textContent = response.answer;
-            chatMessages.scrollTop = chatMessages.scrollHeight;
         } catch (error) {
             botMessageDiv.textContent = 'Sorry, I encountered an error: ' + error.message;
         } finally {